@@ -1,126 +1,45 @@
 import streamlit as st
-import pandas as pd
-import os
+import threading
+
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+
+from college_core import *
 
 # -------------------------
 # Streamlit page setup
 # -------------------------
 st.set_page_config(page_title="PU College Financial Model-2026", layout="wide")
-DATA_DIR = "data"
-os.makedirs(DATA_DIR, exist_ok=True)
 
-# -------------------------
-# Utility: Indian number format (₹12,34,567)
-# -------------------------
-def fmt_inr(num):
-    """Format number with Indian commas (₹1,23,45,678)."""
-    if pd.isna(num): return ""
-    try:
-        num = float(num)
-        if abs(num) < 1000:
-            return f"₹{num:,.0f}"
-        s, *d = str(int(abs(num))), []
-        while s:
-            d.append(s[-2:] if len(d) else s[-3:])
-            s = s[:-2] if len(d) > 1 else s[:-3]
-        sign = '-' if num < 0 else ''
-        return f"{sign}₹{','.join(d[::-1])}"
-    except Exception:
-        return str(num)
+@st.cache_data(show_spinner=False)
+def _chart_data(df, idx, cols):
+    """Build chart input (index + column projection) once per distinct frame."""
+    return df.set_index(idx)[list(cols) if isinstance(cols, tuple) else cols]
 
-# -------------------------
-# Default dataframes
-# -------------------------
-def default_income_df():
-    return pd.DataFrame({
-        "Source": ["1st Year PU", "2nd Year PU", "Admission Fees", "Misc Income"],
-        "No. of Students": [200, 180, None, None],
-        "Fee per Student (₹)": [45000, 45000, None, None],
-        "Notes": ["Science/Commerce", "", "", "Fine, Events, etc."]
-    })
-
-def default_expenses_df():
-    return pd.DataFrame({
-        "Expense Category": [
-            "Infrastructure", "Staff Salaries (Teaching)", "Staff Salaries (Non-Teaching)",
-            "Library", "Events", "Marketing", "Miscellaneous"
-        ],
-        "Per Month (₹)": [80000, 35000, 12000, 5000, 4000, 3000, 2000],
-        "QTY": [1, 5, 2, 1, 1, 1, 1],
-        "Description": ["", "", "", "", "", "", ""]
-    })
-
-def default_distribution_df():
-    return pd.DataFrame({
-        "Head": ["Management Royalty", "Faculty Bonus", "Development Fund", "Reserve"],
-        "Percentage": [20, 10, 30, 10],
-        "Description": ["Share to trust", "Incentives", "Infrastructure", "Contingency"]
-    })
-
-def default_projection_df():
-    return pd.DataFrame({
-        "Year": [f"Year {i}" for i in range(1, 6)],
-        "Projected Income (₹)": [17350000, 18000000, 18700000, 19450000, 20250000],
-        "Projected Expenses (₹)": [4003000, 4200000, 4410000, 4620000, 4840000]
-    })
+# Failures from background save threads, drained on the next rerun.
+_save_errors = []
 
-# -------------------------
-# JSON helpers
-# -------------------------
-def save_df_json(df, name):
-    df.to_json(os.path.join(DATA_DIR, f"{name}.json"), orient="records", indent=2, force_ascii=False)
-
-def load_df_json(name, default_func):
-    path = os.path.join(DATA_DIR, f"{name}.json")
-    if os.path.exists(path):
-        try:
-            return pd.read_json(path)
-        except Exception:
-            df = default_func()
-            save_df_json(df, name)
-            return df
-    else:
-        df = default_func()
-        save_df_json(df, name)
-        return df
+def _flush_state(frames, totals):
+    """Background save target; failures surface in the UI instead of dying silently."""
+    try:
+        save_state(frames, totals)
+    except Exception as e:
+        _save_errors.append(f"{type(e).__name__}: {e}")
 
-# -------------------------
-# Compute helpers
-# -------------------------
-def compute_income(df):
-    df = df.copy()
-    df["No. of Students"] = pd.to_numeric(df.get("No. of Students", 0), errors="coerce").fillna(0)
-    df["Fee per Student (₹)"] = pd.to_numeric(df.get("Fee per Student (₹)", 0), errors="coerce").fillna(0)
-    df["Total (₹)"] = df["No. of Students"] * df["Fee per Student (₹)"]
-    return df
-
-def compute_expenses(df):
-    df = df.copy()
-    df["Per Month (₹)"] = pd.to_numeric(df.get("Per Month (₹)", 0), errors="coerce").fillna(0)
-    df["QTY"] = pd.to_numeric(df.get("QTY", 1), errors="coerce").fillna(0)
-    df["Yearly (₹)"] = df["Per Month (₹)"] * 12 * df["QTY"]
-    return df
-
-def compute_distribution(df, net_balance):
-    df = df.copy()
-    df["Percentage"] = pd.to_numeric(df.get("Percentage", 0), errors="coerce").fillna(0)
-    df["Amount (₹)"] = df["Percentage"] / 100 * net_balance
-    return df
-
-def compute_projection(df):
-    df = df.copy()
-    df["Projected Income (₹)"] = pd.to_numeric(df.get("Projected Income (₹)", 0), errors="coerce").fillna(0)
-    df["Projected Expenses (₹)"] = pd.to_numeric(df.get("Projected Expenses (₹)", 0), errors="coerce").fillna(0)
-    df["Net Projected Balance (₹)"] = df["Projected Income (₹)"] - df["Projected Expenses (₹)"]
-    return df
+@st.cache_data(show_spinner=False)
+def _display_frame(df, cols):
+    """Currency-format the given columns once per distinct frame."""
+    out = df.copy()
+    for col in cols if isinstance(cols, tuple) else (cols,):
+        out[col] = fmt_inr_series(out[col])
+    return out
 
 # -------------------------
 # Load data
 # -------------------------
-income_df = load_df_json("income", default_income_df)
-expenses_df = load_df_json("expenses", default_expenses_df)
-distribution_df = load_df_json("distribution", default_distribution_df)
-projection_df = load_df_json("projection", default_projection_df)
+income_df = load_df("income", default_income_df)
+expenses_df = load_df("expenses", default_expenses_df)
+distribution_df = load_df("distribution", default_distribution_df)
+projection_df = load_df("projection", default_projection_df)
 
 # -------------------------
 # Sidebar Mode
@@ -135,6 +54,10 @@ if mode == "Admin Panel":
     st.markdown("<h2 style='color:#1f77b4;'>🧮 Admin Panel</h2>", unsafe_allow_html=True)
     st.info("Edit inputs below and click **Save & Recalculate** to update totals.")
 
+    # Surface any save failure from a previous rerun's background flush.
+    while _save_errors:
+        st.error(f"⚠️ Save failed — data may not be persisted: {_save_errors.pop(0)}")
+
     with st.expander("📘 Income", expanded=True):
         income_inputs = st.data_editor(income_df, num_rows="dynamic", use_container_width=True)
 
@@ -148,18 +71,30 @@ if mode == "Admin Panel":
         projection_inputs = st.data_editor(projection_df, num_rows="dynamic", use_container_width=True)
 
     if st.button("💾 Save & Recalculate", use_container_width=True, type="primary"):
-        computed_income = compute_income(income_inputs)
-        computed_expenses = compute_expenses(expenses_inputs)
-        total_income = computed_income["Total (₹)"].sum()
-        total_expenses = computed_expenses["Yearly (₹)"].sum()
-        net_balance = total_income - total_expenses
-        computed_distribution = compute_distribution(distribution_inputs, net_balance)
-        computed_projection = compute_projection(projection_inputs)
-
-        save_df_json(computed_income, "income")
-        save_df_json(computed_expenses, "expenses")
-        save_df_json(computed_distribution, "distribution")
-        save_df_json(computed_projection, "projection")
+        (computed_income, computed_expenses, computed_distribution, computed_projection,
+         total_income, total_expenses, net_balance) = recalculate_all(
+            income_inputs, expenses_inputs, distribution_inputs, projection_inputs)
+
+        # Flush in the background so the UI updates while the write completes.
+        # Non-daemon on purpose: interpreter exit waits for the write instead
+        # of killing it mid-flush.
+        threading.Thread(
+            target=_flush_state,
+            args=(
+                {
+                    "income": computed_income,
+                    "expenses": computed_expenses,
+                    "distribution": computed_distribution,
+                    "projection": computed_projection,
+                },
+                {
+                    "total_income": float(total_income),
+                    "total_expenses": float(total_expenses),
+                    "net_balance": float(net_balance),
+                },
+            ),
+            daemon=False,
+        ).start()
 
         st.success(f"✅ Data saved successfully! | Net Balance = {fmt_inr(net_balance)}")
 
@@ -174,13 +109,34 @@ if mode == "Admin Panel":
 else:
     st.markdown("<h2 style='color:#4CAF50;'>📊 PU College Financial Dashboard 2026</h2>", unsafe_allow_html=True)
 
-    income_df = compute_income(income_df)
-    expenses_df = compute_expenses(expenses_df)
-    total_income = income_df["Total (₹)"].sum()
-    total_expenses = expenses_df["Yearly (₹)"].sum()
-    net_balance = total_income - total_expenses
-    distribution_df = compute_distribution(distribution_df, net_balance)
-    projection_df = compute_projection(projection_df)
+    # Saved files already carry the computed columns; only fall back to
+    # compute_* on a first run before Admin has ever hit Save.
+    if "Total (₹)" not in income_df.columns:
+        income_df = compute_income(income_df)
+    if "Yearly (₹)" not in expenses_df.columns:
+        expenses_df = compute_expenses(expenses_df)
+
+    totals = load_totals()
+    if totals is not None:
+        total_income = totals["total_income"]
+        total_expenses = totals["total_expenses"]
+        net_balance = totals["net_balance"]
+    else:
+        total_income = income_df["Total (₹)"].sum()
+        total_expenses = expenses_df["Yearly (₹)"].sum()
+        net_balance = total_income - total_expenses
+
+    if "Amount (₹)" not in distribution_df.columns:
+        distribution_df = compute_distribution(distribution_df, net_balance)
+    if "Net Projected Balance (₹)" not in projection_df.columns:
+        projection_df = compute_projection(projection_df)
+
+    # Nothing to chart or total yet — skip the render work entirely. Gate on
+    # the frames themselves: zeroed totals with real distribution/projection
+    # rows must still render.
+    if income_df.empty and expenses_df.empty and distribution_df.empty and projection_df.empty:
+        st.info("No data yet — use Admin Panel to input values")
+        st.stop()
 
     c1, c2, c3 = st.columns(3)
     c1.metric("💰 Total Income", fmt_inr(total_income))
@@ -191,37 +147,34 @@ else:
 
     # Income section
     st.markdown("<h3 style='color:#1f77b4;'>📘 Income Summary</h3>", unsafe_allow_html=True)
-    income_fmt = income_df.copy()
-    income_fmt["Total (₹)"] = income_fmt["Total (₹)"].map(fmt_inr)
-    st.dataframe(income_fmt, use_container_width=True)
-    st.bar_chart(income_df.set_index("Source")["Total (₹)"])
+    AgGrid(_display_frame(income_df, "Total (₹)"), update_mode=GridUpdateMode.NO_UPDATE, key="grid-income")
+    st.bar_chart(_chart_data(income_df, "Source", "Total (₹)"))
 
     # Expenses section
     st.markdown("<h3 style='color:#e74c3c;'>📗 Expense Summary</h3>", unsafe_allow_html=True)
-    exp_fmt = expenses_df.copy()
-    exp_fmt["Yearly (₹)"] = exp_fmt["Yearly (₹)"].map(fmt_inr)
-    st.dataframe(exp_fmt, use_container_width=True)
-    st.bar_chart(expenses_df.set_index("Expense Category")["Yearly (₹)"])
+    AgGrid(_display_frame(expenses_df, "Yearly (₹)"), update_mode=GridUpdateMode.NO_UPDATE, key="grid-expenses")
+    st.bar_chart(_chart_data(expenses_df, "Expense Category", "Yearly (₹)"))
 
     # Distribution section
     st.markdown("<h3 style='color:#f39c12;'>📙 Fund Distribution</h3>", unsafe_allow_html=True)
-    dist_fmt = distribution_df.copy()
-    dist_fmt["Amount (₹)"] = dist_fmt["Amount (₹)"].map(fmt_inr)
-    st.dataframe(dist_fmt, use_container_width=True)
-    st.bar_chart(distribution_df.set_index("Head")["Amount (₹)"])
+    AgGrid(_display_frame(distribution_df, "Amount (₹)"), update_mode=GridUpdateMode.NO_UPDATE, key="grid-distribution")
+    st.bar_chart(_chart_data(distribution_df, "Head", "Amount (₹)"))
 
     # Projection section
     st.markdown("<h3 style='color:#16a085;'>📈 5-Year Projection</h3>", unsafe_allow_html=True)
-    proj_fmt = projection_df.copy()
-    for col in ["Projected Income (₹)", "Projected Expenses (₹)", "Net Projected Balance (₹)"]:
-        proj_fmt[col] = proj_fmt[col].map(fmt_inr)
-
-    # Highlight "Year" column
-    proj_fmt = proj_fmt.style.set_properties(subset=["Year"], **{'background-color': '#e8f5e9', 'font-weight': 'bold'})
-    st.dataframe(proj_fmt, use_container_width=True)
+    proj_display = _display_frame(projection_df, ("Projected Income (₹)", "Projected Expenses (₹)", "Net Projected Balance (₹)"))
+    # Highlight "Year" column, matching the old Styler treatment.
+    proj_gb = GridOptionsBuilder.from_dataframe(proj_display)
+    proj_gb.configure_column("Year", cellStyle={"backgroundColor": "#e8f5e9", "fontWeight": "bold"})
+    AgGrid(
+        proj_display,
+        gridOptions=proj_gb.build(),
+        update_mode=GridUpdateMode.NO_UPDATE,
+        key="grid-projection",
+    )
 
     st.line_chart(
-        projection_df.set_index("Year")[["Projected Income (₹)", "Projected Expenses (₹)", "Net Projected Balance (₹)"]]
+        _chart_data(projection_df, "Year", ("Projected Income (₹)", "Projected Expenses (₹)", "Net Projected Balance (₹)"))
     )
 
     st.caption("All amounts shown in Indian numbering format (₹10,00,000).")
@@ -0,0 +1,291 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import msgspec
+import orjson
+import functools
+import gzip
+import os
+import re
+import tempfile
+import threading
+
+from numba import njit
+
+DATA_DIR = "data"
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# -------------------------
+# Utility: Indian number format (₹12,34,567)
+# -------------------------
+# Inserts a comma after any digit followed by pairs of digits plus the final
+# group of three, i.e. Indian grouping (₹12,34,567) in a single C-level pass.
+_INR_RE = re.compile(r'(\d)(?=(\d\d)+\d$)')
+
+def fmt_inr(num):
+    """Format number with Indian commas (₹1,23,45,678)."""
+    if pd.isna(num): return ""
+    try:
+        n = round(float(num))
+    except Exception:
+        return str(num)
+    sign = '-' if n < 0 else ''
+    grouped = _INR_RE.sub(r'\1,', str(abs(n)))
+    return f"{sign}₹{grouped}"
+
+def fmt_inr_series(s):
+    """Format a whole numeric column with Indian commas in one vectorized pass."""
+    arr = pd.to_numeric(s, errors="coerce").fillna(0).round().astype("int64")
+    grouped = arr.abs().astype(str).str.replace(_INR_RE, r'\1,', regex=True)
+    return np.where(arr < 0, "-₹", "₹") + grouped
+
+# -------------------------
+# Default dataframes (built once per process; callers copy before mutating)
+# -------------------------
+@functools.lru_cache(maxsize=1)
+def default_income_df():
+    return pd.DataFrame({
+        "Source": ("1st Year PU", "2nd Year PU", "Admission Fees", "Misc Income"),
+        "No. of Students": np.array([200, 180, np.nan, np.nan], dtype="float32"),
+        "Fee per Student (₹)": np.array([45000, 45000, np.nan, np.nan], dtype="float32"),
+        "Notes": ("Science/Commerce", "", "", "Fine, Events, etc.")
+    })
+
+@functools.lru_cache(maxsize=1)
+def default_expenses_df():
+    return pd.DataFrame({
+        "Expense Category": (
+            "Infrastructure", "Staff Salaries (Teaching)", "Staff Salaries (Non-Teaching)",
+            "Library", "Events", "Marketing", "Miscellaneous"
+        ),
+        "Per Month (₹)": np.array([80000, 35000, 12000, 5000, 4000, 3000, 2000], dtype="int32"),
+        "QTY": np.array([1, 5, 2, 1, 1, 1, 1], dtype="int32"),
+        "Description": ("", "", "", "", "", "", "")
+    })
+
+@functools.lru_cache(maxsize=1)
+def default_distribution_df():
+    return pd.DataFrame({
+        "Head": ("Management Royalty", "Faculty Bonus", "Development Fund", "Reserve"),
+        "Percentage": np.array([20, 10, 30, 10], dtype="int32"),
+        "Description": ("Share to trust", "Incentives", "Infrastructure", "Contingency")
+    })
+
+@functools.lru_cache(maxsize=1)
+def default_projection_df():
+    return pd.DataFrame({
+        "Year": tuple(f"Year {i}" for i in range(1, 6)),
+        "Projected Income (₹)": np.array([17350000, 18000000, 18700000, 19450000, 20250000], dtype="int32"),
+        "Projected Expenses (₹)": np.array([4003000, 4200000, 4410000, 4620000, 4840000], dtype="int32")
+    })
+
+# -------------------------
+# Persistence helpers (single aggregated state file)
+# -------------------------
+# Gzip level 1 roughly halves the bytes hitting disk (or network storage)
+# at negligible CPU cost on top of orjson's encoder.
+STATE_PATH = os.path.join(DATA_DIR, "state.json.gz")
+_LEGACY_STATE = os.path.join(DATA_DIR, "state.msgpack")
+_LEGACY_PATHS = {
+    name: (
+        (os.path.join(DATA_DIR, f"{name}.msgpack"), msgspec.msgpack.decode),
+        (os.path.join(DATA_DIR, f"{name}.json"), orjson.loads),
+    )
+    for name in ("income", "expenses", "distribution", "projection")
+}
+
+_STATE_LOCK = threading.Lock()
+
+def save_state(frames, totals):
+    """Serialize all frames plus totals into one compressed file, one write.
+
+    Everything lives in a single state file, so the write must be atomic
+    and safe under concurrent savers: each writer dumps to its own
+    uniquely named temp file under a lock, then renames it into place.
+    Overlapping saves can neither collide on a shared temp path nor
+    publish a half-written gzip.
+    """
+    payload = {name: df.to_dict(orient="records") for name, df in frames.items()}
+    payload["totals"] = totals
+    encoded = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    with _STATE_LOCK:
+        tmp = tempfile.NamedTemporaryFile(dir=DATA_DIR, suffix=".tmp", delete=False)
+        try:
+            with tmp, gzip.open(tmp, "wb", compresslevel=1) as f:
+                f.write(encoded)
+            os.replace(tmp.name, STATE_PATH)
+        except BaseException:
+            try:
+                os.unlink(tmp.name)
+            except OSError:
+                pass
+            raise
+    _load_state.clear()
+
+@st.cache_data(show_spinner=False)
+def _load_state(mtime):
+    with gzip.open(STATE_PATH, "rb") as f:
+        return orjson.loads(f.read())
+
+def load_df(name, default_func):
+    # EAFP throughout: one getmtime/open per candidate instead of exists+open.
+    try:
+        return pd.DataFrame(_load_state(os.path.getmtime(STATE_PATH))[name])
+    except Exception:
+        pass
+    # Migrate from the old stores if present.
+    try:
+        with open(_LEGACY_STATE, "rb") as f:
+            return pd.DataFrame(msgspec.msgpack.decode(f.read())[name])
+    except Exception:
+        pass
+    for path, decode in _LEGACY_PATHS[name]:
+        try:
+            with open(path, "rb") as f:
+                return pd.DataFrame(decode(f.read()))
+        except Exception:
+            pass
+    return default_func().copy()
+
+def load_totals():
+    try:
+        return _load_state(os.path.getmtime(STATE_PATH)).get("totals")
+    except Exception:
+        return None
+
+# -------------------------
+# Compute helpers
+# -------------------------
+def _fast_num(df, col, default=0.0):
+    """Return a column as a NaN-filled numeric array, skipping pd.to_numeric
+    when the dtype is already numeric (the common data_editor case).
+    An absent column broadcasts to `default`, matching how the old
+    pd.to_numeric(df.get(col, default)) chain behaved."""
+    s = df.get(col)
+    if s is None:
+        return np.full(len(df), default)
+    a = s.to_numpy()
+    if a.dtype.kind == "f":
+        m = np.isnan(a)
+        if m.any():
+            a = a.copy()
+            a[m] = 0.0
+        return a
+    if a.dtype.kind in "iu":
+        return a
+    return pd.to_numeric(s, errors="coerce").fillna(0).to_numpy()
+
+# JIT-compiled kernels: one fused loop each, no pandas dispatch per element.
+@njit(cache=True)
+def _income_totals(students, fee):
+    out = np.empty(students.shape[0], dtype=np.int64)
+    for i in range(students.shape[0]):
+        out[i] = students[i] * fee[i]
+    return out
+
+@njit(cache=True)
+def _expenses_yearly(per_month, qty):
+    out = np.empty(per_month.shape[0], dtype=np.int64)
+    for i in range(per_month.shape[0]):
+        out[i] = per_month[i] * 12 * qty[i]
+    return out
+
+@njit(cache=True)
+def _distribution_amount(pct, net_balance):
+    out = np.empty(pct.shape[0], dtype=np.float64)
+    for i in range(pct.shape[0]):
+        out[i] = pct[i] / 100 * net_balance
+    return out
+
+@njit(cache=True)
+def _projection_net(income, expenses):
+    out = np.empty(income.shape[0], dtype=np.int64)
+    for i in range(income.shape[0]):
+        out[i] = income[i] - expenses[i]
+    return out
+
+def compute_income(df, *, copy=False):
+    if copy:
+        df = df.copy()
+    if df.empty:
+        df["Total (₹)"] = pd.Series([], dtype="int64")
+        return df
+    students = _fast_num(df, "No. of Students").astype("float64")
+    fee = _fast_num(df, "Fee per Student (₹)").astype("float64")
+    df["Total (₹)"] = _income_totals(students, fee)
+    df["No. of Students"] = students.astype("float32")
+    df["Fee per Student (₹)"] = fee.astype("float32")
+    return df
+
+def compute_expenses(df, *, copy=False):
+    if copy:
+        df = df.copy()
+    if df.empty:
+        df["Yearly (₹)"] = pd.Series([], dtype="int64")
+        return df
+    per_month = _fast_num(df, "Per Month (₹)").astype("float64")
+    qty = _fast_num(df, "QTY", default=1).astype("float64")
+    df["Yearly (₹)"] = _expenses_yearly(per_month, qty)
+    df["Per Month (₹)"] = per_month.astype("float32")
+    df["QTY"] = qty.astype("int32")
+    return df
+
+def compute_distribution(df, net_balance, *, copy=False):
+    if copy:
+        df = df.copy()
+    if df.empty:
+        df["Amount (₹)"] = pd.Series([], dtype="float64")
+        return df
+    pct = _fast_num(df, "Percentage").astype("float64")
+    df["Amount (₹)"] = _distribution_amount(pct, float(net_balance))
+    df["Percentage"] = pct.astype("float32")
+    return df
+
+def compute_projection(df, *, copy=False):
+    if copy:
+        df = df.copy()
+    if df.empty:
+        df["Net Projected Balance (₹)"] = pd.Series([], dtype="int64")
+        return df
+    income = _fast_num(df, "Projected Income (₹)").astype("float64")
+    expenses = _fast_num(df, "Projected Expenses (₹)").astype("float64")
+    df["Net Projected Balance (₹)"] = _projection_net(income, expenses)
+    df["Projected Income (₹)"] = income.astype("int64")
+    df["Projected Expenses (₹)"] = expenses.astype("int64")
+    return df
+
+def recalculate_all(income, expenses, distribution, projection):
+    """Recompute all four frames in a single fused pass.
+
+    Walks each frame once, summing totals from the freshly computed arrays
+    instead of re-traversing the columns afterwards.
+    """
+    students = _fast_num(income, "No. of Students").astype("float64")
+    fee = _fast_num(income, "Fee per Student (₹)").astype("float64")
+    totals = _income_totals(students, fee)
+    income["Total (₹)"] = totals
+    income["No. of Students"] = students.astype("float32")
+    income["Fee per Student (₹)"] = fee.astype("float32")
+    total_income = int(totals.sum())
+
+    per_month = _fast_num(expenses, "Per Month (₹)").astype("float64")
+    qty = _fast_num(expenses, "QTY", default=1).astype("float64")
+    yearly = _expenses_yearly(per_month, qty)
+    expenses["Yearly (₹)"] = yearly
+    expenses["Per Month (₹)"] = per_month.astype("float32")
+    expenses["QTY"] = qty.astype("int32")
+    total_expenses = int(yearly.sum())
+
+    net_balance = total_income - total_expenses
+
+    pct = _fast_num(distribution, "Percentage").astype("float64")
+    distribution["Amount (₹)"] = _distribution_amount(pct, float(net_balance))
+    distribution["Percentage"] = pct.astype("float32")
+
+    proj_income = _fast_num(projection, "Projected Income (₹)").astype("float64")
+    proj_expenses = _fast_num(projection, "Projected Expenses (₹)").astype("float64")
+    projection["Net Projected Balance (₹)"] = _projection_net(proj_income, proj_expenses)
+    projection["Projected Income (₹)"] = proj_income.astype("int64")
+    projection["Projected Expenses (₹)"] = proj_expenses.astype("int64")
+
+    return income, expenses, distribution, projection, total_income, total_expenses, net_balance
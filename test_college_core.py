@@ -0,0 +1,22 @@
+import pandas as pd
+
+from college_core import fmt_inr, fmt_inr_series
+
+
+def test_fmt_inr_groups_indian_style():
+    assert fmt_inr(999) == "₹999"
+    assert fmt_inr(1000) == "₹1,000"
+    assert fmt_inr(45000) == "₹45,000"
+    assert fmt_inr(1234567) == "₹12,34,567"
+    assert fmt_inr(17350000) == "₹1,73,50,000"
+
+
+def test_fmt_inr_sign_and_nan():
+    assert fmt_inr(-1000) == "-₹1,000"
+    assert fmt_inr(-1234567) == "-₹12,34,567"
+    assert fmt_inr(float("nan")) == ""
+
+
+def test_fmt_inr_series_matches_scalar():
+    s = pd.Series([0, 999, 1000, 45000, 1234567, -1234567, 17350000])
+    assert list(fmt_inr_series(s)) == [fmt_inr(v) for v in s]